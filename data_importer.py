@@ -9,9 +9,21 @@ import sys
 from pathlib import Path
 import logging
 import duckdb
-from lxml import etree
-from typing import Dict, Any, Optional
+import pyarrow as pa
+from xml.parsers import expat
+from typing import Dict, Optional
 import argparse
+import gzip
+import multiprocessing
+import multiprocessing.connection
+import mmap
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import pyzstd
+except ImportError:
+    pyzstd = None
 
 # Setup logging
 logging.basicConfig(
@@ -20,435 +32,696 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class StackExchangeDataImporter:
-    """Import data from multiple Stack Exchange sites into DuckDB"""
+# XML attribute names for each table, in table column order after the
+# leading site column. Values stay raw strings; DuckDB casts them to the
+# column types on insert (see TableAppender).
+POSTS_KEYS = (
+    'Id', 'PostTypeId', 'AcceptedAnswerId', 'CreationDate', 'Score',
+    'ViewCount', 'Body', 'OwnerUserId', 'LastEditorUserId', 'LastEditDate',
+    'LastActivityDate', 'Title', 'Tags', 'AnswerCount', 'CommentCount',
+    'ContentLicense', 'ParentId', 'ClosedDate'
+)
+
+USERS_KEYS = (
+    'Id', 'Reputation', 'CreationDate', 'DisplayName', 'LastAccessDate',
+    'WebsiteUrl', 'Location', 'AboutMe', 'Views', 'UpVotes', 'DownVotes',
+    'ProfileImageUrl', 'EmailHash', 'AccountId'
+)
+
+COMMENTS_KEYS = (
+    'Id', 'PostId', 'Score', 'Text', 'CreationDate', 'UserDisplayName',
+    'UserId', 'ContentLicense'
+)
+
+VOTES_KEYS = (
+    'Id', 'PostId', 'VoteTypeId', 'CreationDate', 'UserId', 'BountyAmount'
+)
+
+TAGS_KEYS = (
+    'Id', 'TagName', 'Count', 'ExcerptPostId', 'WikiPostId'
+)
+
+BADGES_KEYS = (
+    'Id', 'UserId', 'Name', 'Date', 'Class', 'TagBased'
+)
+
+# Dump file and attribute keys for each table, keyed by table name
+TABLE_SOURCES = {
+    "posts": ("Posts.xml", POSTS_KEYS),
+    "users": ("Users.xml", USERS_KEYS),
+    "comments": ("Comments.xml", COMMENTS_KEYS),
+    "votes": ("Votes.xml", VOTES_KEYS),
+    "tags": ("Tags.xml", TAGS_KEYS),
+    "badges": ("Badges.xml", BADGES_KEYS),
+}
+
+def parse_row(attrs: Dict[str, str], site_name: str, keys: tuple) -> tuple:
+    """Build a table row from a <row> element's attributes using the table's keys"""
+    return (site_name, *map(attrs.get, keys))
+
+def get_total_memory() -> Optional[int]:
+    """Get total physical memory in bytes, or None if it cannot be determined"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+# Compressed variants of each dump file, checked in priority order
+XML_SUFFIXES = ('', '.gz', '.zst')
+
+# Bytes handed to the XML parser per call
+XML_CHUNK_SIZE = 1 << 20
+
+# Uncompressed dumps get one parser process per this many bytes, up to the CPU count
+XML_SHARD_SIZE = 256 * 1024 * 1024
+
+def find_xml_file(data_folder, filename: str) -> Optional[Path]:
+    """Find a dump file, accepting plain, gzip or zstd compressed copies"""
+    for suffix in XML_SUFFIXES:
+        path = Path(data_folder) / f"{filename}{suffix}"
+        if path.exists():
+            if suffix == '.zst' and pyzstd is None:
+                logger.warning(f"Skipping {path}: pyzstd is not installed")
+                continue
+            return path
+    return None
+
+def open_xml_file(xml_file: Path):
+    """Open a dump file for binary reading, decompressing on the fly"""
+    if xml_file.suffix == '.gz':
+        return gzip.open(xml_file, 'rb')
+    if xml_file.suffix == '.zst':
+        return pyzstd.ZstdFile(xml_file, 'rb')
+    return open(xml_file, 'rb')
+
+def split_xml_file(xml_file: Path, shard_size: int = XML_SHARD_SIZE) -> list:
+    """Split a large uncompressed dump into byte ranges of whole <row> elements
     
-    def __init__(self, db_path: str = "stackexchange.db"):
-        """Initialize the importer with database path"""
-        self.db_path = db_path
-        self.conn = duckdb.connect(db_path)
-        self.create_tables()
+    Rows are single self-closing tags and '<' cannot appear inside attribute
+    values, so every b'<row ' starts a row. Returns [None], meaning the
+    whole file, for compressed or small dumps.
+    """
+    if xml_file.suffix in ('.gz', '.zst'):
+        return [None]
+    parts = min(os.cpu_count() or 1, xml_file.stat().st_size // shard_size)
+    if parts <= 1:
+        return [None]
+    with open(xml_file, 'rb') as stream, mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        start = mapped.find(b'<row ')
+        # The closing root tag ends the last range
+        end = mapped.rfind(b'</')
+        if start < 0 or end < start:
+            return [None]
+        bounds = [start]
+        for part in range(1, parts):
+            boundary = mapped.find(b'<row ', start + (end - start) * part // parts, end)
+            if boundary > bounds[-1]:
+                bounds.append(boundary)
+        bounds.append(end)
+    return list(zip(bounds, bounds[1:]))
+
+def iter_xml_chunks(xml_file: Path, byte_range: Optional[tuple] = None, chunk_size: int = XML_CHUNK_SIZE):
+    """Yield a dump file's bytes in chunks, memory-mapping uncompressed files
     
-    def create_tables(self):
-        """Create database tables with site column"""
-        logger.info("Creating database tables...")
-        
-        # Posts table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS posts (
-                site VARCHAR NOT NULL,
-                id INTEGER NOT NULL,
-                post_type_id INTEGER,
-                accepted_answer_id INTEGER,
-                creation_date TIMESTAMP,
-                score INTEGER,
-                view_count INTEGER,
-                body TEXT,
-                owner_user_id INTEGER,
-                last_editor_user_id INTEGER,
-                last_edit_date TIMESTAMP,
-                last_activity_date TIMESTAMP,
-                title VARCHAR,
-                tags VARCHAR,
-                answer_count INTEGER,
-                comment_count INTEGER,
-                content_license VARCHAR,
-                parent_id INTEGER,
-                closed_date TIMESTAMP,
-                PRIMARY KEY (site, id)
-            )
-        """)
-        
-        # Users table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                site VARCHAR NOT NULL,
-                id INTEGER NOT NULL,
-                reputation INTEGER,
-                creation_date TIMESTAMP,
-                display_name VARCHAR,
-                last_access_date TIMESTAMP,
-                website_url VARCHAR,
-                location VARCHAR,
-                about_me TEXT,
-                views INTEGER,
-                up_votes INTEGER,
-                down_votes INTEGER,
-                profile_image_url VARCHAR,
-                email_hash VARCHAR,
-                account_id INTEGER,
-                PRIMARY KEY (site, id)
-            )
-        """)
-        
-        # Comments table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS comments (
-                site VARCHAR NOT NULL,
-                id INTEGER NOT NULL,
-                post_id INTEGER NOT NULL,
-                score INTEGER,
-                text TEXT,
-                creation_date TIMESTAMP,
-                user_display_name VARCHAR,
-                user_id INTEGER,
-                content_license VARCHAR,
-                PRIMARY KEY (site, id)
-            )
-        """)
-        
-        # Votes table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS votes (
-                site VARCHAR NOT NULL,
-                id INTEGER NOT NULL,
-                post_id INTEGER NOT NULL,
-                vote_type_id INTEGER,
-                creation_date TIMESTAMP,
-                user_id INTEGER,
-                bounty_amount INTEGER,
-                PRIMARY KEY (site, id)
-            )
-        """)
-        
-        # Tags table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS tags (
-                site VARCHAR NOT NULL,
-                id INTEGER NOT NULL,
-                tag_name VARCHAR,
-                count INTEGER,
-                excerpt_post_id INTEGER,
-                wiki_post_id INTEGER,
-                PRIMARY KEY (site, id)
-            )
-        """)
-        
-        # Badges table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS badges (
-                site VARCHAR NOT NULL,
-                id INTEGER NOT NULL,
-                user_id INTEGER,
-                name VARCHAR,
-                date TIMESTAMP,
-                class INTEGER,
-                tag_based BOOLEAN,
-                PRIMARY KEY (site, id)
-            )
-        """)
-        
-        logger.info("Database tables created successfully")
+    With a byte_range from split_xml_file only that range is read, wrapped
+    in a root element so it parses as a document of its own.
+    """
+    with open_xml_file(xml_file) as stream:
+        if xml_file.suffix in ('.gz', '.zst'):
+            yield from iter(lambda: stream.read(chunk_size), b'')
+            return
+        size = os.fstat(stream.fileno()).st_size
+        if not size:
+            return
+        start, end = byte_range or (0, size)
+        with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, 'madvise'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            if byte_range:
+                yield b'<rows>'
+            for offset in range(start, end, chunk_size):
+                yield mapped[offset:min(offset + chunk_size, end)]
+            if byte_range:
+                yield b'</rows>'
+
+def iter_xml_rows(xml_file: Path, byte_range: Optional[tuple] = None):
+    """Stream the attributes of each <row> in a Stack Exchange XML dump
+    
+    expat hands every element's attributes over as a plain dict and builds
+    no element tree, so rows need no clearing once they have been read.
+    """
+    rows = []
+    
+    def start_element(name, attrs):
+        if name == 'row':
+            rows.append(attrs)
+    
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start_element
+    for chunk in iter_xml_chunks(xml_file, byte_range):
+        parser.Parse(chunk, False)
+        yield from rows
+        rows.clear()
+    parser.Parse(b'', True)
+    yield from rows
+
+def iter_record_batches(rows, schema: pa.Schema, batch_size: int):
+    """Group row tuples into column-wise string RecordBatches of batch_size rows"""
+    # Preallocate column buffers and fill them by index to avoid list growth
+    columns = [[None] * batch_size for _ in schema]
+    count = 0
+    for row in rows:
+        for column, value in zip(columns, row):
+            column[count] = value
+        count += 1
+        if count == batch_size:
+            yield pa.RecordBatch.from_arrays([pa.array(column, type=pa.string()) for column in columns], schema=schema)
+            count = 0
+    if count:
+        yield pa.RecordBatch.from_arrays([pa.array(column[:count], type=pa.string()) for column in columns], schema=schema)
+
+def send_xml_batches(xml_file: Path, site_name: str, keys: tuple, schema: pa.Schema, batch_size: int, sender,
+                     byte_range: Optional[tuple] = None):
+    """Parse a dump file and send its rows to the parent process as serialized Arrow batches"""
+    try:
+        rows = (parse_row(attrs, site_name, keys) for attrs in iter_xml_rows(xml_file, byte_range))
+        for batch in iter_record_batches(rows, schema, batch_size):
+            sender.send_bytes(batch.serialize())
+    finally:
+        sender.close()
+
+# Parser processes are spawned rather than forked, since the parent holds
+# DuckDB state and runs several import threads
+PARSER_CONTEXT = multiprocessing.get_context('spawn')
+
+class TableAppender:
+    """Stream rows for one table into DuckDB with a single INSERT
+    
+    Rows are collected column-wise as strings into PyArrow RecordBatches
+    and exposed to DuckDB as a RecordBatchReader, so a whole file is loaded
+    by one INSERT ... SELECT scan that casts to the table's column types.
+    """
     
-    def parse_date(self, date_str: str) -> Optional[str]:
-        """Parse date string to proper format"""
-        if not date_str:
-            return None
+    def __init__(self, conn, table: str, batch_size: int = 1000):
+        """Initialize the appender for a table, reading its columns from the catalog"""
+        self.conn = conn
+        self.table = table
+        self.batch_size = batch_size
+        columns = conn.execute("""
+            SELECT column_name, data_type
+            FROM information_schema.columns
+            WHERE table_name = ?
+            ORDER BY ordinal_position
+        """, [table]).fetchall()
+        self.schema = pa.schema([(name, pa.string()) for name, _ in columns])
+        self.view_name = f"{table}_stream"
+        # TRY_CAST turns malformed numbers, booleans and dates into NULL rather than failing the load
+        casts = ", ".join(f'TRY_CAST("{name}" AS {data_type})' for name, data_type in columns)
+        self.insert_sql = f"INSERT INTO {table} SELECT {casts} FROM {self.view_name}"
+    
+    def load(self, rows):
+        """Insert every row from an iterable of tuples in table column order"""
+        self._insert(iter_record_batches(rows, self.schema, self.batch_size))
+    
+    def load_xml(self, xml_file: Path, site_name: str, keys: tuple, byte_ranges: Optional[list] = None):
+        """Insert every row of a dump file, parsing it in separate processes
+        
+        One parser process is started per entry of byte_ranges (None for the
+        whole file). Parsing and inserting overlap instead of alternating,
+        and each pipe holds little more than one batch, which bounds how far
+        the parsers can run ahead of DuckDB.
+        """
+        parsers = []
+        receivers = []
+        for byte_range in byte_ranges or [None]:
+            receiver, sender = PARSER_CONTEXT.Pipe(duplex=False)
+            parser = PARSER_CONTEXT.Process(
+                target=send_xml_batches,
+                args=(xml_file, site_name, keys, self.schema, self.batch_size, sender, byte_range),
+                daemon=True
+            )
+            parser.start()
+            sender.close()
+            parsers.append(parser)
+            receivers.append(receiver)
         try:
-            # Stack Exchange dates are in ISO format
-            return date_str
-        except:
-            return None
+            self._insert(self._receive_batches(receivers))
+        finally:
+            for receiver in receivers:
+                receiver.close()
+            for parser in parsers:
+                parser.join()
+        for parser in parsers:
+            if parser.exitcode != 0:
+                raise RuntimeError(f"Parsing {xml_file} failed with exit code {parser.exitcode}")
+    
+    def _receive_batches(self, receivers):
+        """Yield RecordBatches from parser processes as they arrive until every pipe is closed"""
+        pending = list(receivers)
+        while pending:
+            for receiver in multiprocessing.connection.wait(pending):
+                try:
+                    payload = receiver.recv_bytes()
+                except EOFError:
+                    pending.remove(receiver)
+                    continue
+                yield pa.ipc.read_record_batch(pa.py_buffer(payload), self.schema)
     
-    def safe_int(self, value: str) -> Optional[int]:
-        """Safely convert string to int"""
-        if not value:
-            return None
+    def _insert(self, batches):
+        """Run the table's INSERT over a stream of RecordBatches"""
+        reader = pa.RecordBatchReader.from_batches(self.schema, batches)
+        self.conn.register(self.view_name, reader)
         try:
-            return int(value)
-        except:
-            return None
+            self.conn.execute(self.insert_sql)
+        finally:
+            self.conn.unregister(self.view_name)
+
+# Table definitions, keyed by table name. Every table carries a site column.
+TABLE_DDL = {
+    "posts": """
+        CREATE TABLE IF NOT EXISTS posts (
+            site VARCHAR NOT NULL,
+            id INTEGER NOT NULL,
+            post_type_id INTEGER,
+            accepted_answer_id INTEGER,
+            creation_date TIMESTAMP,
+            score INTEGER,
+            view_count INTEGER,
+            body TEXT,
+            owner_user_id INTEGER,
+            last_editor_user_id INTEGER,
+            last_edit_date TIMESTAMP,
+            last_activity_date TIMESTAMP,
+            title VARCHAR,
+            tags VARCHAR,
+            answer_count INTEGER,
+            comment_count INTEGER,
+            content_license VARCHAR,
+            parent_id INTEGER,
+            closed_date TIMESTAMP
+        )
+    """,
+    "users": """
+        CREATE TABLE IF NOT EXISTS users (
+            site VARCHAR NOT NULL,
+            id INTEGER NOT NULL,
+            reputation INTEGER,
+            creation_date TIMESTAMP,
+            display_name VARCHAR,
+            last_access_date TIMESTAMP,
+            website_url VARCHAR,
+            location VARCHAR,
+            about_me TEXT,
+            views INTEGER,
+            up_votes INTEGER,
+            down_votes INTEGER,
+            profile_image_url VARCHAR,
+            email_hash VARCHAR,
+            account_id INTEGER
+        )
+    """,
+    "comments": """
+        CREATE TABLE IF NOT EXISTS comments (
+            site VARCHAR NOT NULL,
+            id INTEGER NOT NULL,
+            post_id INTEGER NOT NULL,
+            score INTEGER,
+            text TEXT,
+            creation_date TIMESTAMP,
+            user_display_name VARCHAR,
+            user_id INTEGER,
+            content_license VARCHAR
+        )
+    """,
+    "votes": """
+        CREATE TABLE IF NOT EXISTS votes (
+            site VARCHAR NOT NULL,
+            id INTEGER NOT NULL,
+            post_id INTEGER NOT NULL,
+            vote_type_id INTEGER,
+            creation_date TIMESTAMP,
+            user_id INTEGER,
+            bounty_amount INTEGER
+        )
+    """,
+    "tags": """
+        CREATE TABLE IF NOT EXISTS tags (
+            site VARCHAR NOT NULL,
+            id INTEGER NOT NULL,
+            tag_name VARCHAR,
+            count INTEGER,
+            excerpt_post_id INTEGER,
+            wiki_post_id INTEGER
+        )
+    """,
+    "badges": """
+        CREATE TABLE IF NOT EXISTS badges (
+            site VARCHAR NOT NULL,
+            id INTEGER NOT NULL,
+            user_id INTEGER,
+            name VARCHAR,
+            date TIMESTAMP,
+            class INTEGER,
+            tag_based BOOLEAN
+        )
+    """,
+}
+
+# Secondary indexes for the web app's equality lookups (answers of a question,
+# comments of a post). DuckDB's ART indexes only serve point and highly
+# selective filters, so sort columns are left to its vectorized Top-N.
+LOOKUP_INDEXES = {
+    "posts_parent_idx": "posts (site, parent_id)",
+    "comments_post_idx": "comments (site, post_id)",
+}
+
+# Schema the fts extension creates for the index over posts_search
+SEARCH_INDEX_SCHEMA = "fts_main_posts_search"
+
+def search_index_exists(conn) -> bool:
+    """Check whether the full-text index over posts has been built"""
+    return conn.execute(
+        "SELECT COUNT(*) FROM duckdb_schemas() WHERE schema_name = ?", [SEARCH_INDEX_SCHEMA]
+    ).fetchone()[0] > 0
+
+# Table recording that the index was skipped because fts could not be loaded,
+# so later startups do not open a writer to retry; a new import tries again
+SEARCH_INDEX_SKIPPED_TABLE = "search_index_skipped"
+
+def search_index_settled(conn) -> bool:
+    """Check whether the full-text index has been built or recorded as skipped"""
+    if search_index_exists(conn):
+        return True
+    return conn.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [SEARCH_INDEX_SKIPPED_TABLE]
+    ).fetchone()[0] > 0
+
+# Per-site rollups served by the web app's home and analytics pages,
+# rebuilt whenever a site is imported
+SUMMARY_DDL = {
+    "site_stats": """
+        CREATE TABLE IF NOT EXISTS site_stats (
+            site VARCHAR NOT NULL,
+            total_posts BIGINT,
+            total_questions BIGINT,
+            total_answers BIGINT,
+            latest_activity TIMESTAMP,
+            total_users BIGINT,
+            total_comments BIGINT,
+            last_refreshed TIMESTAMP
+        )
+    """,
+    "posts_by_month": """
+        CREATE TABLE IF NOT EXISTS posts_by_month (
+            site VARCHAR NOT NULL,
+            month TIMESTAMP,
+            count BIGINT
+        )
+    """,
+    "top_tags": """
+        CREATE TABLE IF NOT EXISTS top_tags (
+            site VARCHAR NOT NULL,
+            rank INTEGER,
+            tag_name VARCHAR,
+            count INTEGER
+        )
+    """,
+    "score_distribution": """
+        CREATE TABLE IF NOT EXISTS score_distribution (
+            site VARCHAR NOT NULL,
+            range_name VARCHAR,
+            sort_order INTEGER,
+            count BIGINT
+        )
+    """,
+}
+
+SUMMARY_QUERIES = {
+    "site_stats": """
+        INSERT INTO site_stats
+        SELECT 
+            $site,
+            COUNT(*),
+            COUNT(*) FILTER (WHERE post_type_id = 1),
+            COUNT(*) FILTER (WHERE post_type_id = 2),
+            MAX(creation_date),
+            (SELECT COUNT(*) FROM users WHERE site = $site),
+            (SELECT COUNT(*) FROM comments WHERE site = $site),
+            now()
+        FROM posts
+        WHERE site = $site
+    """,
+    "posts_by_month": """
+        INSERT INTO posts_by_month
+        SELECT $site, DATE_TRUNC('month', creation_date) AS month, COUNT(*)
+        FROM posts
+        WHERE post_type_id = 1 AND site = $site
+        GROUP BY month
+    """,
+    "top_tags": """
+        INSERT INTO top_tags
+        SELECT $site, row_number() OVER (ORDER BY count DESC, tag_name) AS rank, tag_name, count
+        FROM tags
+        WHERE site = $site
+        ORDER BY rank
+        LIMIT 100
+    """,
+    "score_distribution": """
+        INSERT INTO score_distribution
+        SELECT 
+            $site,
+            ['Negative', 'Zero', '1-5', '6-10', '11-20', '20+'][sort_order],
+            sort_order,
+            COUNT(*)
+        FROM (
+            SELECT 
+                CASE 
+                    WHEN score < 0 THEN 1
+                    WHEN score = 0 THEN 2
+                    WHEN score <= 5 THEN 3
+                    WHEN score <= 10 THEN 4
+                    WHEN score <= 20 THEN 5
+                    ELSE 6
+                END as sort_order
+            FROM posts
+            WHERE post_type_id = 1 AND site = $site
+        ) sub
+        GROUP BY sort_order
+    """,
+}
+
+def derived_data_complete(conn) -> bool:
+    """Check, on any connection including a read-only one, that summaries and the search index are built"""
+    tables = {name for (name,) in conn.execute("SELECT table_name FROM duckdb_tables()").fetchall()}
+    if not tables.issuperset(SUMMARY_DDL):
+        return False
+    missing_sites = conn.execute(
+        "SELECT COUNT(DISTINCT site) FROM posts WHERE site NOT IN (SELECT site FROM site_stats)"
+    ).fetchone()[0]
+    return missing_sites == 0 and search_index_settled(conn)
+
+class StackExchangeDataImporter:
+    """Import data from multiple Stack Exchange sites into DuckDB"""
     
-    def safe_bool(self, value: str) -> Optional[bool]:
-        """Safely convert string to bool"""
-        if not value:
-            return None
-        return value.lower() == 'true'
+    TABLES = ('posts', 'users', 'comments', 'votes', 'tags', 'badges')
     
-    def import_posts(self, site_name: str, data_folder: str):
-        """Import posts from Posts.xml"""
-        posts_file = Path(data_folder) / "Posts.xml"
-        if not posts_file.exists():
-            logger.warning(f"Posts.xml not found in {data_folder}")
-            return
-        
-        logger.info(f"Importing posts for {site_name}...")
-        
-        # Clear existing posts for this site
-        self.conn.execute("DELETE FROM posts WHERE site = ?", [site_name])
-        
-        # Parse and insert posts
-        parser = etree.iterparse(str(posts_file), events=('start', 'end'))
-        parser = iter(parser)
-        event, root = next(parser)
+    def __init__(self, db_path: str = "stackexchange.db", read_only: bool = False, bulk_load: bool = True):
+        """Initialize the importer with database path
         
-        batch = []
-        batch_size = 1000
-        
-        for event, elem in parser:
-            if event == 'end' and elem.tag == 'row':
-                post_data = (
-                    site_name,
-                    self.safe_int(elem.get('Id')),
-                    self.safe_int(elem.get('PostTypeId')),
-                    self.safe_int(elem.get('AcceptedAnswerId')),
-                    self.parse_date(elem.get('CreationDate')),
-                    self.safe_int(elem.get('Score')),
-                    self.safe_int(elem.get('ViewCount')),
-                    elem.get('Body'),
-                    self.safe_int(elem.get('OwnerUserId')),
-                    self.safe_int(elem.get('LastEditorUserId')),
-                    self.parse_date(elem.get('LastEditDate')),
-                    self.parse_date(elem.get('LastActivityDate')),
-                    elem.get('Title'),
-                    elem.get('Tags'),
-                    self.safe_int(elem.get('AnswerCount')),
-                    self.safe_int(elem.get('CommentCount')),
-                    elem.get('ContentLicense'),
-                    self.safe_int(elem.get('ParentId')),
-                    self.parse_date(elem.get('ClosedDate'))
-                )
-                batch.append(post_data)
-                
-                if len(batch) >= batch_size:
-                    self.conn.executemany("""
-                        INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, batch)
-                    batch = []
-                
-                elem.clear()
-                root.clear()
-        
-        # Insert remaining records
-        if batch:
-            self.conn.executemany("""
-                INSERT INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, batch)
-        
-        count = self.conn.execute("SELECT COUNT(*) FROM posts WHERE site = ?", [site_name]).fetchone()[0]
-        logger.info(f"Imported {count} posts for {site_name}")
+        A read-only importer skips ingest tuning and table creation and is
+        enough for get_site_stats and list_sites. Pass bulk_load=False to
+        keep DuckDB's default settings on a writable connection.
+        """
+        self.db_path = db_path
+        self.batch_size = 50000
+        self.conn = duckdb.connect(db_path, read_only=read_only)
+        if not read_only:
+            if bulk_load:
+                self.configure_connection()
+            self.create_tables()
     
-    def import_users(self, site_name: str, data_folder: str):
-        """Import users from Users.xml"""
-        users_file = Path(data_folder) / "Users.xml"
-        if not users_file.exists():
-            logger.warning(f"Users.xml not found in {data_folder}")
+    def configure_connection(self):
+        """Tune DuckDB settings for bulk ingest"""
+        # Insertion order is irrelevant for the dumps and costs memory on large loads
+        self.conn.execute("SET preserve_insertion_order = false")
+        self.conn.execute(f"SET threads = {os.cpu_count() or 1}")
+        memory_bytes = get_total_memory()
+        if memory_bytes:
+            self.conn.execute(f"SET memory_limit = '{int(memory_bytes * 0.7) // (1024 * 1024)}MB'")
+        temp_directory = os.environ.get("DUCKDB_TEMP_DIRECTORY")
+        if temp_directory:
+            self.conn.execute("SET temp_directory = '{}'".format(temp_directory.replace("'", "''")))
+        self.conn.execute("SET checkpoint_threshold = '4GB'")
+        self.conn.execute("SET enable_progress_bar = false")
+    
+    @contextmanager
+    def transaction(self):
+        """Run a block inside a single DuckDB transaction on its own cursor
+        
+        Each block gets a dedicated cursor so imports running on different
+        threads keep independent transactions against the shared database.
+        """
+        conn = self.conn.cursor()
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            conn.close()
+            raise
+        conn.execute("COMMIT")
+        conn.close()
+    
+    def create_tables(self):
+        """Create any missing database tables, skipping DDL when all exist"""
+        existing = {
+            row[0] for row in self.conn.execute(
+                "SELECT table_name FROM duckdb_tables() WHERE schema_name = 'main'"
+            ).fetchall()
+        }
+        ddl = {**TABLE_DDL, **SUMMARY_DDL}
+        missing = [table for table in ddl if table not in existing]
+        if not missing:
             return
         
-        logger.info(f"Importing users for {site_name}...")
-        
-        # Clear existing users for this site
-        self.conn.execute("DELETE FROM users WHERE site = ?", [site_name])
-        
-        parser = etree.iterparse(str(users_file), events=('start', 'end'))
-        parser = iter(parser)
-        event, root = next(parser)
-        
-        batch = []
-        batch_size = 1000
-        
-        for event, elem in parser:
-            if event == 'end' and elem.tag == 'row':
-                user_data = (
-                    site_name,
-                    self.safe_int(elem.get('Id')),
-                    self.safe_int(elem.get('Reputation')),
-                    self.parse_date(elem.get('CreationDate')),
-                    elem.get('DisplayName'),
-                    self.parse_date(elem.get('LastAccessDate')),
-                    elem.get('WebsiteUrl'),
-                    elem.get('Location'),
-                    elem.get('AboutMe'),
-                    self.safe_int(elem.get('Views')),
-                    self.safe_int(elem.get('UpVotes')),
-                    self.safe_int(elem.get('DownVotes')),
-                    elem.get('ProfileImageUrl'),
-                    elem.get('EmailHash'),
-                    self.safe_int(elem.get('AccountId'))
-                )
-                batch.append(user_data)
-                
-                if len(batch) >= batch_size:
-                    self.conn.executemany("""
-                        INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, batch)
-                    batch = []
-                
-                elem.clear()
-                root.clear()
-        
-        if batch:
-            self.conn.executemany("""
-                INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, batch)
-        
-        count = self.conn.execute("SELECT COUNT(*) FROM users WHERE site = ?", [site_name]).fetchone()[0]
-        logger.info(f"Imported {count} users for {site_name}")
+        logger.info("Creating database tables...")
+        for table in missing:
+            self.conn.execute(ddl[table])
+        if any(table in SUMMARY_DDL for table in missing):
+            # A new summary table needs every site's summaries rebuilt;
+            # emptying site_stats makes refresh_missing_summaries redo them all
+            self.conn.execute("DELETE FROM site_stats")
+        logger.info("Database tables created successfully")
+    
+    def drop_key_indexes(self):
+        """Drop the (site, id) unique and lookup indexes so bulk loads skip index maintenance"""
+        for table in self.TABLES:
+            self.conn.execute(f"DROP INDEX IF EXISTS {table}_pk")
+        for index_name in LOOKUP_INDEXES:
+            self.conn.execute(f"DROP INDEX IF EXISTS {index_name}")
     
-    def import_comments(self, site_name: str, data_folder: str):
-        """Import comments from Comments.xml"""
-        comments_file = Path(data_folder) / "Comments.xml"
-        if not comments_file.exists():
-            logger.warning(f"Comments.xml not found in {data_folder}")
+    def create_key_indexes(self):
+        """Build the (site, id) unique and lookup indexes once all data has been loaded"""
+        logger.info("Creating key indexes...")
+        for table in self.TABLES:
+            self.conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_pk ON {table} (site, id)")
+        for index_name, target in LOOKUP_INDEXES.items():
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {target}")
+    
+    def clear_site(self, conn, table: str, site_name: str):
+        """Remove a site's existing rows before a re-import
+        
+        First-time loads skip the DELETE entirely. DuckDB 1.3 has no MERGE and
+        an upsert would keep rows dropped from newer dumps, so re-imports still
+        replace the site's rows wholesale.
+        """
+        exists = conn.execute(f"SELECT 1 FROM {table} WHERE site = ? LIMIT 1", [site_name]).fetchone()
+        if exists:
+            conn.execute(f"DELETE FROM {table} WHERE site = ?", [site_name])
+    
+    def import_table(self, table: str, site_name: str, data_folder: str):
+        """Import one table for a site from its XML dump file"""
+        filename, keys = TABLE_SOURCES[table]
+        xml_file = find_xml_file(data_folder, filename)
+        if xml_file is None:
+            logger.warning(f"{filename} not found in {data_folder}")
             return
         
-        logger.info(f"Importing comments for {site_name}...")
-        
-        # Clear existing comments for this site
-        self.conn.execute("DELETE FROM comments WHERE site = ?", [site_name])
-        
-        parser = etree.iterparse(str(comments_file), events=('start', 'end'))
-        parser = iter(parser)
-        event, root = next(parser)
+        logger.info(f"Importing {table} for {site_name}...")
         
-        batch = []
-        batch_size = 1000
-        
-        for event, elem in parser:
-            if event == 'end' and elem.tag == 'row':
-                comment_data = (
-                    site_name,
-                    self.safe_int(elem.get('Id')),
-                    self.safe_int(elem.get('PostId')),
-                    self.safe_int(elem.get('Score')),
-                    elem.get('Text'),
-                    self.parse_date(elem.get('CreationDate')),
-                    elem.get('UserDisplayName'),
-                    self.safe_int(elem.get('UserId')),
-                    elem.get('ContentLicense')
-                )
-                batch.append(comment_data)
-                
-                if len(batch) >= batch_size:
-                    self.conn.executemany("""
-                        INSERT INTO comments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, batch)
-                    batch = []
-                
-                elem.clear()
-                root.clear()
-        
-        if batch:
-            self.conn.executemany("""
-                INSERT INTO comments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, batch)
-        
-        count = self.conn.execute("SELECT COUNT(*) FROM comments WHERE site = ?", [site_name]).fetchone()[0]
-        logger.info(f"Imported {count} comments for {site_name}")
-    
-    def import_other_tables(self, site_name: str, data_folder: str):
-        """Import votes, tags, and badges"""
-        data_folder = Path(data_folder)
-        
-        # Import votes
-        votes_file = data_folder / "Votes.xml"
-        if votes_file.exists():
-            logger.info(f"Importing votes for {site_name}...")
-            self.conn.execute("DELETE FROM votes WHERE site = ?", [site_name])
-            
-            parser = etree.iterparse(str(votes_file), events=('start', 'end'))
-            parser = iter(parser)
-            event, root = next(parser)
+        with self.transaction() as conn:
+            # Clear existing rows for this site
+            self.clear_site(conn, table, site_name)
             
-            batch = []
-            for event, elem in parser:
-                if event == 'end' and elem.tag == 'row':
-                    vote_data = (
-                        site_name,
-                        self.safe_int(elem.get('Id')),
-                        self.safe_int(elem.get('PostId')),
-                        self.safe_int(elem.get('VoteTypeId')),
-                        self.parse_date(elem.get('CreationDate')),
-                        self.safe_int(elem.get('UserId')),
-                        self.safe_int(elem.get('BountyAmount'))
-                    )
-                    batch.append(vote_data)
-                    
-                    if len(batch) >= 1000:
-                        self.conn.executemany("INSERT INTO votes VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
-                        batch = []
-                    
-                    elem.clear()
-                    root.clear()
+            # Parse and insert rows, splitting large files across parser processes
+            TableAppender(conn, table, self.batch_size).load_xml(xml_file, site_name, keys, split_xml_file(xml_file))
             
-            if batch:
-                self.conn.executemany("INSERT INTO votes VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+            count = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE site = ?", [site_name]).fetchone()[0]
         
-        # Import tags
-        tags_file = data_folder / "Tags.xml"
-        if tags_file.exists():
-            logger.info(f"Importing tags for {site_name}...")
-            self.conn.execute("DELETE FROM tags WHERE site = ?", [site_name])
-            
-            parser = etree.iterparse(str(tags_file), events=('start', 'end'))
-            parser = iter(parser)
-            event, root = next(parser)
-            
-            batch = []
-            for event, elem in parser:
-                if event == 'end' and elem.tag == 'row':
-                    tag_data = (
-                        site_name,
-                        self.safe_int(elem.get('Id')),
-                        elem.get('TagName'),
-                        self.safe_int(elem.get('Count')),
-                        self.safe_int(elem.get('ExcerptPostId')),
-                        self.safe_int(elem.get('WikiPostId'))
-                    )
-                    batch.append(tag_data)
-                    
-                    if len(batch) >= 1000:
-                        self.conn.executemany("INSERT INTO tags VALUES (?, ?, ?, ?, ?, ?)", batch)
-                        batch = []
-                    
-                    elem.clear()
-                    root.clear()
-            
-            if batch:
-                self.conn.executemany("INSERT INTO tags VALUES (?, ?, ?, ?, ?, ?)", batch)
+        logger.info(f"Imported {count} {table} for {site_name}")
+    
+    def refresh_summaries(self, site_name: str):
+        """Rebuild a site's rows in the summary tables from its imported data"""
+        with self.transaction() as conn:
+            for table, query in SUMMARY_QUERIES.items():
+                conn.execute(f"DELETE FROM {table} WHERE site = ?", [site_name])
+                conn.execute(query, {"site": site_name})
+    
+    def refresh_missing_summaries(self, rebuild_index: bool = False):
+        """Build summaries for imported sites that do not have any yet
+        
+        The full-text index is rebuilt when rebuild_index is set (after new
+        imports), when any summary was refreshed or when it was neither built
+        nor recorded as skipped.
+        """
+        sites = self.conn.execute(
+            "SELECT DISTINCT site FROM posts WHERE site NOT IN (SELECT site FROM site_stats)"
+        ).fetchall()
+        for (site_name,) in sites:
+            logger.info(f"Building summaries for {site_name}...")
+            self.refresh_summaries(site_name)
+        if rebuild_index or sites or not search_index_settled(self.conn):
+            self.build_search_index()
+    
+    def build_search_index(self):
+        """Rebuild the full-text index over post titles and bodies
+        
+        The fts extension needs a unique document key and post ids are only
+        unique per site, so the index is built over a posts_search copy keyed
+        by a sequential doc_id; once indexed, the copy keeps only the keys.
+        Skipped, and recorded as such, if the extension cannot be loaded.
+        """
+        try:
+            # Installing needs the network, so only do it when the extension is not already there
+            try:
+                self.conn.execute("LOAD fts")
+            except duckdb.Error:
+                self.conn.execute("INSTALL fts")
+                self.conn.execute("LOAD fts")
+        except duckdb.Error as e:
+            logger.warning(f"Skipping full-text index, fts extension unavailable: {e}")
+            self.conn.execute(f"CREATE OR REPLACE TABLE {SEARCH_INDEX_SKIPPED_TABLE} (reason VARCHAR)")
+            self.conn.execute(f"INSERT INTO {SEARCH_INDEX_SKIPPED_TABLE} VALUES (?)", [str(e)])
+            return
         
-        # Import badges
-        badges_file = data_folder / "Badges.xml"
-        if badges_file.exists():
-            logger.info(f"Importing badges for {site_name}...")
-            self.conn.execute("DELETE FROM badges WHERE site = ?", [site_name])
-            
-            parser = etree.iterparse(str(badges_file), events=('start', 'end'))
-            parser = iter(parser)
-            event, root = next(parser)
-            
-            batch = []
-            for event, elem in parser:
-                if event == 'end' and elem.tag == 'row':
-                    badge_data = (
-                        site_name,
-                        self.safe_int(elem.get('Id')),
-                        self.safe_int(elem.get('UserId')),
-                        elem.get('Name'),
-                        self.parse_date(elem.get('Date')),
-                        self.safe_int(elem.get('Class')),
-                        self.safe_bool(elem.get('TagBased'))
-                    )
-                    batch.append(badge_data)
-                    
-                    if len(batch) >= 1000:
-                        self.conn.executemany("INSERT INTO badges VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
-                        batch = []
-                    
-                    elem.clear()
-                    root.clear()
-            
-            if batch:
-                self.conn.executemany("INSERT INTO badges VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+        logger.info("Building full-text search index...")
+        self.conn.execute("""
+            CREATE OR REPLACE TABLE posts_search AS
+            SELECT row_number() OVER () AS doc_id, site, id, title, body
+            FROM posts
+        """)
+        self.conn.execute("""
+            PRAGMA create_fts_index(
+                'posts_search', 'doc_id', 'title', 'body',
+                stemmer = 'porter', stopwords = 'english', overwrite = 1
+            )
+        """)
+        # match_bm25 only reads the index's own tables, so the copied text can go
+        self.conn.execute("ALTER TABLE posts_search DROP COLUMN title")
+        self.conn.execute("ALTER TABLE posts_search DROP COLUMN body")
+        self.conn.execute(f"DROP TABLE IF EXISTS {SEARCH_INDEX_SKIPPED_TABLE}")
+        self.conn.execute("CHECKPOINT")
     
     def import_site_data(self, site_name: str, data_folder: str):
-        """Import all data for a specific site"""
+        """Import all data for a specific site
+        
+        The full-text index covers every site, so callers rebuild it once
+        with build_search_index after their last import.
+        """
         logger.info(f"Starting import for site: {site_name}")
         
-        self.import_posts(site_name, data_folder)
-        self.import_users(site_name, data_folder)
-        self.import_comments(site_name, data_folder)
-        self.import_other_tables(site_name, data_folder)
+        # Each table comes from its own file, so the imports run concurrently;
+        # every import parses in its own process while DuckDB inserts here
+        # Tables are loaded without key indexes; they are rebuilt in one pass afterwards
+        self.drop_key_indexes()
+        with ThreadPoolExecutor(max_workers=len(self.TABLES)) as executor:
+            futures = [executor.submit(self.import_table, table, site_name, data_folder) for table in self.TABLES]
+            for future in futures:
+                future.result()
+        self.create_key_indexes()
+        self.refresh_summaries(site_name)
+        # Write the loaded tables out once instead of leaving them in the WAL
+        self.conn.execute("CHECKPOINT")
         
         logger.info(f"Completed import for site: {site_name}")
     
@@ -456,8 +729,7 @@ class StackExchangeDataImporter:
         """Get statistics for a site"""
         stats = {}
         
-        tables = ['posts', 'users', 'comments', 'votes', 'tags', 'badges']
-        for table in tables:
+        for table in self.TABLES:
             try:
                 count = self.conn.execute(f"SELECT COUNT(*) FROM {table} WHERE site = ?", [site_name]).fetchone()[0]
                 stats[table] = count
@@ -495,6 +767,7 @@ def main():
     importer = StackExchangeDataImporter(args.db_path)
     try:
         importer.import_site_data(args.site, args.data_folder)
+        importer.build_search_index()
         
         # Show stats
         stats = importer.get_site_stats(args.site)
@@ -1,66 +1,207 @@
 from fastapi import FastAPI, Request, Query, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse
+from jinja2 import FileSystemBytecodeCache
 import duckdb
 from typing import Optional, List, Dict, Any
+import asyncio
 import html
-import re
+import os
+import queue
+import threading
+import time
+from functools import lru_cache
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+from data_importer import get_total_memory, search_index_exists
 
-app = FastAPI(title="StackSlice", description="Slice and dice Stack Exchange data")
+app = FastAPI(
+    title="StackSlice",
+    description="Slice and dice Stack Exchange data",
+    default_response_class=ORJSONResponse
+)
 
-# Setup templates and static files
-templates = Jinja2Templates(directory="templates")
+# Setup templates and static files. Templates only change with a deploy, so
+# skip the per-render mtime check (unless STACKSLICE_DEV is set), keep every
+# compiled template in memory and its bytecode on disk between restarts, and
+# compile every template at startup.
+TEMPLATE_CACHE_DIR = ".jinja_cache"
+os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+templates = Jinja2Templates(
+    directory="templates",
+    auto_reload=bool(os.environ.get("STACKSLICE_DEV")),
+    cache_size=-1,
+    bytecode_cache=FileSystemBytecodeCache(TEMPLATE_CACHE_DIR),
+)
+for template_name in templates.env.list_templates(extensions=["html"]):
+    templates.env.get_template(template_name)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Database connection
 DB_PATH = "stackexchange.db"
 
+# Worker processes started by run.py; each gets an equal share of cores and memory
+WEB_CONCURRENCY = max(1, int(os.environ.get("WEB_CONCURRENCY") or 1))
+WORKER_CPUS = max(1, (os.cpu_count() or 4) // WEB_CONCURRENCY)
+
+def worker_db_config() -> Dict[str, Any]:
+    """DuckDB settings for this worker's connection, splitting cores and DuckDB's default 80% of RAM"""
+    config = {"threads": WORKER_CPUS}
+    memory_bytes = get_total_memory()
+    if memory_bytes:
+        config["memory_limit"] = f"{int(memory_bytes * 0.8) // WEB_CONCURRENCY // (1024 * 1024)}MB"
+    return config
+
+# Memoized query results are reused for up to this many seconds
+CACHE_TTL_SECONDS = 60
+
+# Shared read-only connection, opened on first use; requests work on their own cursors
+db_connection = None
+db_connection_lock = threading.Lock()
+
+# Whether the importer's full-text index over posts is present and usable
+search_index_available = False
+
+def open_db():
+    """Open the shared read-only connection and detect the full-text index"""
+    global search_index_available
+    conn = duckdb.connect(DB_PATH, read_only=True, config=worker_db_config())
+    try:
+        conn.execute("LOAD fts")
+        search_index_available = search_index_exists(conn)
+    except duckdb.Error:
+        search_index_available = False
+    return conn
+
+class PooledCursor:
+    """A cursor borrowed from the pool; close() hands it back instead of closing it"""
+    
+    def __init__(self, pool: "queue.Queue", cursor):
+        self.pool = pool
+        self.cursor = cursor
+    
+    def execute(self, *args):
+        """Run a query on the borrowed cursor"""
+        return self.cursor.execute(*args)
+    
+    def close(self):
+        """Return the cursor to the pool (safe to call more than once)"""
+        if self.cursor is not None:
+            self.pool.put(self.cursor)
+            self.cursor = None
+
+# At most this many queries run against DuckDB at once; further requests wait
+# for a free cursor. DuckDB parallelises each query itself, so about one
+# cursor per core is enough.
+DB_POOL_SIZE = int(os.environ.get("STACKSLICE_POOL_SIZE", WORKER_CPUS))
+db_cursor_pool = None
+
 def get_db():
-    """Get database connection"""
-    return duckdb.connect(DB_PATH)
+    """Borrow a cursor on the shared connection, waiting while all are in use"""
+    global db_connection, db_cursor_pool
+    with db_connection_lock:
+        if db_connection is None:
+            db_connection = open_db()
+            db_cursor_pool = queue.Queue()
+            for _ in range(DB_POOL_SIZE):
+                db_cursor_pool.put(db_connection.cursor())
+        pool = db_cursor_pool
+    return PooledCursor(pool, pool.get())
+
+@app.on_event("shutdown")
+def close_db():
+    """Close the shared database connection when the server stops"""
+    global db_connection, db_cursor_pool
+    with db_connection_lock:
+        if db_connection is not None:
+            db_connection.close()
+            db_connection = None
+            db_cursor_pool = None
+    _invalidate_sites_cache()
+
+@app.on_event("startup")
+def warm_db():
+    """Open the database and fill the site list and default home page caches before serving
+    
+    Runs in every worker, so the first request (often the healthcheck on /)
+    does not pay for opening the connection, loading fts and reading the
+    first blocks from disk.
+    """
+    sites = get_available_sites()
+    if sites:
+        try:
+            load_home_data(sites[0], cache_bucket())
+        except duckdb.Error:
+            pass
+
+def cache_bucket() -> int:
+    """Current cache time bucket; results cached under an older bucket are no longer hit"""
+    return int(time.time() // CACHE_TTL_SECONDS)
 
 def get_available_sites():
     """Get list of available sites in the database, with main sites first, then meta sites"""
+    return list(load_available_sites(cache_bucket()))
+
+@lru_cache(maxsize=1)
+def load_available_sites(bucket: int) -> tuple:
+    """Load the sorted site list for a cache bucket"""
     try:
         conn = get_db()
-        sites = conn.execute("SELECT DISTINCT site FROM posts ORDER BY site").fetchall()
-        conn.close()
+        try:
+            sites = conn.execute("SELECT DISTINCT site FROM posts ORDER BY site").fetchall()
+        finally:
+            conn.close()
         site_list = [site[0] for site in sites]
         
         # Sort to put main sites first, then meta sites
         main_sites = [s for s in site_list if not s.endswith('.meta.stackexchange.com')]
         meta_sites = [s for s in site_list if s.endswith('.meta.stackexchange.com')]
         
-        return main_sites + meta_sites
+        return tuple(main_sites + meta_sites)
     except:
-        return []
+        return ()
+
+@lru_cache(maxsize=1)
+def load_site_set(bucket: int) -> frozenset:
+    """Load the available sites as a set for membership checks in a cache bucket"""
+    return frozenset(load_available_sites(bucket))
+
+def _invalidate_sites_cache():
+    """Forget the cached site list so the next request reads it again"""
+    load_available_sites.cache_clear()
+    load_site_set.cache_clear()
 
 def get_default_site():
     """Get the default site (first available site)"""
-    sites = get_available_sites()
+    sites = load_available_sites(cache_bucket())
     return sites[0] if sites else "ai.stackexchange.com"
 
 def validate_site(site: str) -> str:
     """Validate and return a valid site name"""
-    available_sites = get_available_sites()
-    if site and site in available_sites:
+    if site and site in load_site_set(cache_bucket()):
         return site
     return get_default_site()
 
-def clean_html(text: str) -> str:
-    """Clean HTML tags from text and decode entities"""
-    if not text:
+# Tag-stripped body characters fetched for list previews; the margin beyond
+# the preview length absorbs HTML entities that shrink once decoded
+BODY_PREVIEW_LENGTH = 200
+BODY_FETCH_LENGTH = 1000
+
+def format_body_preview(body_text: Optional[str]) -> str:
+    """Decode entities in a tag-stripped body prefix and cut it to preview length"""
+    if not body_text:
         return ""
-    # Remove HTML tags
-    clean = re.compile('<.*?>')
-    text = re.sub(clean, '', text)
-    # Decode HTML entities
-    text = html.unescape(text)
+    truncated = len(body_text) > BODY_FETCH_LENGTH
+    text = html.unescape(body_text[:BODY_FETCH_LENGTH])
+    if truncated or len(text) > BODY_PREVIEW_LENGTH:
+        return text[:BODY_PREVIEW_LENGTH] + "..."
     return text
 
+# Display format for dates, shared by format_date and strftime in listing queries
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
 def format_date(date_obj) -> str:
     """Format datetime object for display"""
     if not date_obj:
@@ -70,65 +211,178 @@ def format_date(date_obj) -> str:
             date_obj = datetime.fromisoformat(date_obj)
         except:
             return date_obj
-    return date_obj.strftime("%Y-%m-%d %H:%M")
+    return date_obj.strftime(DATE_FORMAT)
+
+def fetch_dicts(result) -> List[Dict[str, Any]]:
+    """Fetch all rows of an executed query as dicts keyed by column name"""
+    columns = [column[0] for column in result.description]
+    return [dict(zip(columns, row)) for row in result.fetchall()]
+
+def query_dicts(query: str, params: list) -> List[Dict[str, Any]]:
+    """Run a query on its own cursor and fetch its rows as dicts"""
+    conn = get_db()
+    try:
+        return fetch_dicts(conn.execute(query, params))
+    finally:
+        conn.close()
 
 def extract_tags(tags_str: str) -> List[str]:
     """Extract individual tags from tag string"""
     if not tags_str:
         return []
-    # Tags are in format |tag1|tag2|tag3|
+    # Tags are in format |tag1|tag2|tag3|, so trimming the outer bars leaves a plain split
+    if tags_str.startswith('|') and tags_str.endswith('|') and '||' not in tags_str:
+        return tags_str[1:-1].split('|') if len(tags_str) > 1 else []
     return [tag for tag in tags_str.split('|') if tag]
 
-@app.get("/", response_class=HTMLResponse)
-async def home(request: Request, site: Optional[str] = Query(None)):
-    """Home page with overview statistics"""
-    site = validate_site(site)
+# Keyset sort options for the listings: (sort key expression, key type, descending).
+# Keys are made non-null so every row stays reachable from a cursor.
+POST_SORTS = {
+    "recent": ("COALESCE(creation_date, TIMESTAMP '1970-01-01')", "TIMESTAMP", True),
+    "score": ("COALESCE(score, 0)", "INTEGER", True),
+    "views": ("COALESCE(view_count, 0)", "INTEGER", True),
+}
+
+USER_SORTS = {
+    "reputation": ("COALESCE(reputation, 0)", "INTEGER", True),
+    "recent": ("COALESCE(creation_date, TIMESTAMP '1970-01-01')", "TIMESTAMP", True),
+    "name": ("COALESCE(display_name, '')", "VARCHAR", False),
+}
+
+def parse_int32(value: str) -> int:
+    """Parse an integer that fits DuckDB's INTEGER type"""
+    number = int(value)
+    if not -2**31 <= number < 2**31:
+        raise ValueError(f"integer out of range: {value}")
+    return number
+
+# Python parsers checking a cursor_key against its sort key type before it reaches SQL
+CURSOR_KEY_PARSERS = {
+    "TIMESTAMP": datetime.fromisoformat,
+    "INTEGER": parse_int32,
+    "VARCHAR": str,
+}
+
+def parse_cursor_key(cursor_key: Optional[str], key_type: str):
+    """Parse a cursor_key for a sort key type, giving None if it is missing or malformed"""
+    if cursor_key is None:
+        return None
+    try:
+        return CURSOR_KEY_PARSERS[key_type](cursor_key)
+    except ValueError:
+        return None
+
+def keyset_page(sort_spec: tuple, cursor_key: Optional[str], cursor_id: Optional[int], before: bool):
+    """Build the cursor condition, its params and the ORDER BY for one listing page
+    
+    Pages after (or, with before, ahead of) a cursor row are found by
+    comparing (sort key, id) instead of skipping rows with OFFSET. Paging
+    backwards runs the order in reverse, so callers must then reverse the
+    rows. A missing or malformed cursor gives no condition and the forward
+    order, so the page falls back to OFFSET.
+    """
+    sort_expr, key_type, descending = sort_spec
+    cursor_key = parse_cursor_key(cursor_key, key_type)
+    if cursor_key is None or cursor_id is None:
+        direction = "DESC" if descending else "ASC"
+        return None, [], f"{sort_expr} {direction}, id {direction}"
+    if before:
+        descending = not descending
+    direction, op = ("DESC", "<") if descending else ("ASC", ">")
+    order_clause = f"{sort_expr} {direction}, id {direction}"
+    cursor = f"CAST(? AS {key_type})"
+    condition = f"({sort_expr} {op} {cursor} OR ({sort_expr} = {cursor} AND id {op} ?))"
+    return condition, [cursor_key, cursor_key, cursor_id], order_clause
+
+def listing_total(conn, count_query: str, count_params: list, rows: list, keyset: bool, before: bool,
+                  page: int, limit: int) -> int:
+    """Work out a listing's total row count, reusing the page query's window count
+    
+    Page rows end with COUNT(*) OVER (): the full match count for OFFSET
+    pages, or the rows from the cursor on for forward keyset pages, whose
+    earlier pages are all full. Other cases fall back to a COUNT query.
+    """
+    if rows and not keyset:
+        return rows[0][-1]
+    if keyset and not before:
+        return (page - 1) * limit + (rows[0][-1] if rows else 0)
+    return conn.execute(count_query, count_params).fetchone()[0]
+
+def page_numbers(current_page: int, total_pages: int) -> List[Optional[int]]:
+    """List the page links to show, with None marking a gap
+    
+    Shows the first and last three pages and two either side of the current
+    one, without walking every page of a large listing.
+    """
+    candidates = {1, 2, 3, 4, total_pages - 3, total_pages - 2, total_pages - 1, total_pages}
+    candidates.update(range(current_page - 2, current_page + 3))
+    numbers = []
+    for page_num in sorted(p for p in candidates if 1 <= p <= total_pages):
+        if page_num <= 3 or page_num > total_pages - 3 or abs(page_num - current_page) <= 2:
+            numbers.append(page_num)
+        elif page_num == 4 or page_num == total_pages - 3:
+            numbers.append(None)
+    return numbers
+
+# Query parameters that position a listing page within one site's rows
+PAGE_CURSOR_PARAMS = ("page", "cursor_key", "cursor_id", "before")
+
+def page_cursor(row, key_index: int) -> Dict[str, Any]:
+    """Build the cursor query values identifying a listing row"""
+    return {"key": str(row[key_index]), "id": row[0]}
+
+@lru_cache(maxsize=32)
+def load_home_data(site: str, bucket: int):
+    """Load the home page statistics and top tags for a site and cache bucket"""
     conn = get_db()
     
     try:
         # Get basic statistics for the selected site
         stats = {}
         
-        # Total posts
-        result = conn.execute("SELECT COUNT(*) as total FROM posts WHERE site = ?", [site]).fetchone()
-        stats['total_posts'] = result[0] if result else 0
-        
-        # Total questions (PostTypeId = 1)
-        result = conn.execute("SELECT COUNT(*) as total FROM posts WHERE site = ? AND post_type_id = 1", [site]).fetchone()
-        stats['total_questions'] = result[0] if result else 0
-        
-        # Total answers (PostTypeId = 2)
-        result = conn.execute("SELECT COUNT(*) as total FROM posts WHERE site = ? AND post_type_id = 2", [site]).fetchone()
-        stats['total_answers'] = result[0] if result else 0
-        
-        # Total users
-        result = conn.execute("SELECT COUNT(*) as total FROM users WHERE site = ?", [site]).fetchone()
-        stats['total_users'] = result[0] if result else 0
-        
-        # Total comments
-        result = conn.execute("SELECT COUNT(*) as total FROM comments WHERE site = ?", [site]).fetchone()
-        stats['total_comments'] = result[0] if result else 0
-        
-        # Most recent activity
+        # Counts and latest activity are precomputed at import time
         result = conn.execute("""
-            SELECT creation_date 
-            FROM posts 
+            SELECT total_posts, total_questions, total_answers, latest_activity, total_users, total_comments
+            FROM site_stats
             WHERE site = ?
-            ORDER BY creation_date DESC 
-            LIMIT 1
         """, [site]).fetchone()
-        stats['latest_activity'] = format_date(result[0]) if result else "N/A"
+        stats['total_posts'] = result[0] if result else 0
+        stats['total_questions'] = result[1] if result else 0
+        stats['total_answers'] = result[2] if result else 0
+        stats['latest_activity'] = format_date(result[3]) if result and result[3] else "N/A"
+        stats['total_users'] = result[4] if result else 0
+        stats['total_comments'] = result[5] if result else 0
         
-        # Top tags
+        # Top tags, precomputed at import time
         top_tags = conn.execute("""
             SELECT tag_name, count 
-            FROM tags 
+            FROM top_tags
             WHERE site = ?
-            ORDER BY count DESC 
+            ORDER BY rank
             LIMIT 10
         """, [site]).fetchall()
         
+        return stats, top_tags
+    finally:
         conn.close()
+
+@lru_cache(maxsize=32)
+def load_site_totals(site: str, bucket: int) -> Dict[str, Any]:
+    """Load a site's precomputed row counts from site_stats for a cache bucket"""
+    rows = query_dicts("""
+        SELECT total_posts, total_questions, total_answers, total_users
+        FROM site_stats
+        WHERE site = ?
+    """, [site])
+    return rows[0] if rows else {}
+
+@app.get("/", response_class=HTMLResponse)
+def home(request: Request, site: Optional[str] = Query(None)):
+    """Home page with overview statistics"""
+    site = validate_site(site)
+    
+    try:
+        stats, top_tags = load_home_data(site, cache_bucket())
         
         return templates.TemplateResponse("home.html", {
             "request": request,
@@ -139,21 +393,35 @@ async def home(request: Request, site: Optional[str] = Query(None)):
         })
         
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.get("/posts", response_class=HTMLResponse)
-async def posts_page(
+def posts_page(
     request: Request,
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     search: Optional[str] = None,
     post_type: Optional[str] = None,
     sort: str = Query("recent"),
-    site: Optional[str] = Query(None)
+    site: Optional[str] = Query(None),
+    cursor_key: Optional[str] = None,
+    cursor_id: Optional[int] = None,
+    before: bool = False
 ):
-    """Browse posts with pagination and filtering"""
+    """Browse posts with pagination and filtering
+    
+    Previous/next links carry a cursor (the neighbouring row's sort key and
+    id); page numbers without a cursor fall back to OFFSET.
+    """
     site = validate_site(site)
+    
+    # Without a search the total is one of the site's precomputed counts. Look it
+    # up before borrowing a cursor, as a cache miss needs a cursor of its own.
+    known_total = None
+    if not search:
+        total_key = {"questions": "total_questions", "answers": "total_answers"}.get(post_type, "total_posts")
+        known_total = load_site_totals(site, cache_bucket()).get(total_key)
+    
     conn = get_db()
     
     try:
@@ -163,38 +431,49 @@ async def posts_page(
         where_conditions = ["site = ?"]
         params = [site]
         
-        if search:
+        # Every search term must match, like the ILIKE fallback, since results
+        # keep the chosen sort order rather than being ranked by relevance
+        if search and search_index_available:
+            where_conditions.append("""id IN (
+                SELECT id FROM posts_search
+                WHERE site = ? AND fts_main_posts_search.match_bm25(doc_id, ?, conjunctive := 1) IS NOT NULL
+            )""")
+            params.extend([site, search])
+        elif search:
             where_conditions.append("(title ILIKE ? OR body ILIKE ?)")
             params.extend([f"%{search}%", f"%{search}%"])
         
+        # Post types are fixed, so they go into the SQL text as constants the planner can use
         if post_type == "questions":
-            where_conditions.append("post_type_id = ?")
-            params.append(1)
+            where_conditions.append("post_type_id = 1")
         elif post_type == "answers":
-            where_conditions.append("post_type_id = ?")
-            params.append(2)
+            where_conditions.append("post_type_id = 2")
         
         where_clause = " AND ".join(where_conditions)
         
-        # Build ORDER BY clause
-        if sort == "recent":
-            order_clause = "creation_date DESC"
-        elif sort == "score":
-            order_clause = "score DESC"
-        elif sort == "views":
-            order_clause = "view_count DESC"
-        else:
-            order_clause = "creation_date DESC"
-        
-        # Get total count
+        # Fallback total count, used when the page query's window count cannot give the total
         count_query = f"SELECT COUNT(*) FROM posts WHERE {where_clause}"
-        total = conn.execute(count_query, params).fetchone()[0]
-        
-        # Get posts
+        count_params = list(params)
+        
+        # Build ORDER BY clause and cursor condition
+        sort_spec = POST_SORTS.get(sort, POST_SORTS["recent"])
+        cursor_condition, cursor_params, order_clause = keyset_page(sort_spec, cursor_key, cursor_id, before)
+        before = before and cursor_condition is not None
+        if cursor_condition:
+            where_clause += f" AND {cursor_condition}"
+            params.extend(cursor_params)
+            offset = 0
+        
+        # Get posts; bodies are stripped of tags and shortened in DuckDB
         query = f"""
             SELECT 
                 id, post_type_id, title, score, view_count, answer_count,
-                creation_date, owner_user_id, tags, body
+                COALESCE(strftime(creation_date, '{DATE_FORMAT}'), '') AS creation_date_text,
+                owner_user_id,
+                list_filter(COALESCE(string_split(tags, '|'), []), lambda tag: tag != '') AS tag_list,
+                left(regexp_replace(body, '<[^>]*>', '', 'g'), {BODY_FETCH_LENGTH + 1}) AS body_text,
+                {sort_spec[0]} AS sort_key
+                {", COUNT(*) OVER () AS matched" if known_total is None else ""}
             FROM posts 
             WHERE {where_clause}
             ORDER BY {order_clause}
@@ -203,6 +482,12 @@ async def posts_page(
         params.extend([limit, offset])
         
         posts_data = conn.execute(query, params).fetchall()
+        if known_total is not None:
+            total = known_total
+        else:
+            total = listing_total(conn, count_query, count_params, posts_data, cursor_condition is not None, before, page, limit)
+        if before:
+            posts_data.reverse()
         
         # Format posts data
         posts = []
@@ -210,14 +495,15 @@ async def posts_page(
             post = {
                 'id': row[0],
                 'post_type_id': row[1],
+                'is_question': row[1] == 1,
                 'title': row[2] or "No title",
                 'score': row[3],
                 'view_count': row[4],
                 'answer_count': row[5],
-                'creation_date': format_date(row[6]),
+                'creation_date': row[6],
                 'owner_user_id': row[7],
-                'tags': extract_tags(row[8]),
-                'body_preview': clean_html(row[9])[:200] + "..." if len(clean_html(row[9])) > 200 else clean_html(row[9])
+                'tags': row[8],
+                'body_preview': format_body_preview(row[9])
             }
             posts.append(post)
         
@@ -231,6 +517,7 @@ async def posts_page(
             "posts": posts,
             "current_page": page,
             "total_pages": total_pages,
+            "page_numbers": page_numbers(page, total_pages),
             "total_posts": total,
             "search": search or "",
             "post_type": post_type or "",
@@ -239,6 +526,8 @@ async def posts_page(
             "has_next": page < total_pages,
             "prev_page": page - 1 if page > 1 else None,
             "next_page": page + 1 if page < total_pages else None,
+            "prev_cursor": page_cursor(posts_data[0], 10) if posts_data else None,
+            "next_cursor": page_cursor(posts_data[-1], 10) if posts_data else None,
             "current_site": site,
             "available_sites": get_available_sites()
         })
@@ -249,87 +538,106 @@ async def posts_page(
 
 @app.get("/posts/{post_id}", response_class=HTMLResponse)
 async def post_detail(request: Request, post_id: int, site: Optional[str] = Query(None)):
-    """View a specific post with its answers and comments"""
-    site = validate_site(site)
-    conn = get_db()
+    """View a specific post with its answers and comments
+    
+    Kept async to run the answers and comments queries concurrently; every
+    blocking DuckDB call goes through a worker thread.
+    """
+    site = await asyncio.to_thread(validate_site, site)
     
     try:
         # Get the main post
         post_query = """
-            SELECT p.*, u.display_name as owner_name
-            FROM posts p
-            LEFT JOIN users u ON p.owner_user_id = u.id AND u.site = p.site
-            WHERE p.id = ? AND p.site = ?
+            SELECT 
+                id, post_type_id, accepted_answer_id, title, body, score,
+                view_count, creation_date, owner_user_id, tags, answer_count,
+                comment_count
+            FROM posts
+            WHERE id = ? AND site = ?
         """
-        post_data = conn.execute(post_query, [post_id, site]).fetchone()
+        post_rows = await asyncio.to_thread(query_dicts, post_query, [post_id, site])
         
-        if not post_data:
+        if not post_rows:
             raise HTTPException(status_code=404, detail="Post not found")
+        post_data = post_rows[0]
         
         # Format main post
         post = {
-            'id': post_data[1],  # Updated index after adding site column
-            'post_type_id': post_data[2],
-            'title': post_data[12] or "No title",
-            'body': post_data[7],
-            'score': post_data[5],
-            'view_count': post_data[6],
-            'creation_date': format_date(post_data[4]),
-            'owner_user_id': post_data[8],
-            'owner_name': post_data[-1] or "Unknown User",
-            'tags': extract_tags(post_data[13]),
-            'answer_count': post_data[14],
-            'comment_count': post_data[15]
+            'id': post_data['id'],
+            'post_type_id': post_data['post_type_id'],
+            'title': post_data['title'] or "No title",
+            'body': post_data['body'],
+            'score': post_data['score'],
+            'view_count': post_data['view_count'],
+            'creation_date': format_date(post_data['creation_date']),
+            'owner_user_id': post_data['owner_user_id'],
+            'tags': extract_tags(post_data['tags']),
+            'answer_count': post_data['answer_count'],
+            'comment_count': post_data['comment_count']
         }
         
-        # Get answers if this is a question
-        answers = []
-        if post['post_type_id'] == 1:
-            answers_query = """
-                SELECT p.*, u.display_name as owner_name
-                FROM posts p
-                LEFT JOIN users u ON p.owner_user_id = u.id AND u.site = p.site
-                WHERE p.parent_id = ? AND p.post_type_id = 2 AND p.site = ?
-                ORDER BY p.score DESC, p.creation_date ASC
-            """
-            answers_data = conn.execute(answers_query, [post_id, site]).fetchall()
-            
-            for answer_data in answers_data:
-                answer = {
-                    'id': answer_data[1],  # Updated index after adding site column
-                    'body': answer_data[7],
-                    'score': answer_data[5],
-                    'creation_date': format_date(answer_data[4]),
-                    'owner_user_id': answer_data[8],
-                    'owner_name': answer_data[-1] or "Unknown User",
-                    'is_accepted': answer_data[1] == post_data[3]  # accepted_answer_id
-                }
-                answers.append(answer)
-        
-        # Get comments for the post
+        answers_query = """
+            SELECT id, body, score, creation_date, owner_user_id
+            FROM posts
+            WHERE parent_id = ? AND post_type_id = 2 AND site = ?
+            ORDER BY score DESC, creation_date ASC
+        """
         comments_query = """
-            SELECT c.*, u.display_name as user_name
-            FROM comments c
-            LEFT JOIN users u ON c.user_id = u.id AND u.site = c.site
-            WHERE c.post_id = ? AND c.site = ?
-            ORDER BY c.creation_date ASC
+            SELECT id, text, score, creation_date, user_id
+            FROM comments
+            WHERE post_id = ? AND site = ?
+            ORDER BY creation_date ASC
         """
-        comments_data = conn.execute(comments_query, [post_id, site]).fetchall()
+        
+        # Answers (for questions) and comments are independent, so fetch them concurrently
+        comments_task = asyncio.to_thread(query_dicts, comments_query, [post_id, site])
+        if post['post_type_id'] == 1:
+            answers_task = asyncio.to_thread(query_dicts, answers_query, [post_id, site])
+            answers_data, comments_data = await asyncio.gather(answers_task, comments_task)
+        else:
+            answers_data, comments_data = [], await comments_task
+        
+        # Look up every author's name at once instead of joining users into each query
+        user_ids = {post_data['owner_user_id']}
+        user_ids.update(answer_data['owner_user_id'] for answer_data in answers_data)
+        user_ids.update(comment_data['user_id'] for comment_data in comments_data)
+        user_ids.discard(None)
+        user_names = {}
+        if user_ids:
+            names_query = """
+                SELECT id, display_name
+                FROM users
+                WHERE site = ? AND id IN (SELECT unnest(?))
+            """
+            name_rows = await asyncio.to_thread(query_dicts, names_query, [site, sorted(user_ids)])
+            user_names = {row['id']: row['display_name'] for row in name_rows}
+        post['owner_name'] = user_names.get(post_data['owner_user_id']) or "Unknown User"
+        
+        answers = []
+        for answer_data in answers_data:
+            answer = {
+                'id': answer_data['id'],
+                'body': answer_data['body'],
+                'score': answer_data['score'],
+                'creation_date': format_date(answer_data['creation_date']),
+                'owner_user_id': answer_data['owner_user_id'],
+                'owner_name': user_names.get(answer_data['owner_user_id']) or "Unknown User",
+                'is_accepted': answer_data['id'] == post_data['accepted_answer_id']
+            }
+            answers.append(answer)
         
         comments = []
         for comment_data in comments_data:
             comment = {
-                'id': comment_data[1],  # Updated index after adding site column
-                'text': comment_data[4],
-                'score': comment_data[3],
-                'creation_date': format_date(comment_data[5]),
-                'user_id': comment_data[7],
-                'user_name': comment_data[-1] or "Unknown User"
+                'id': comment_data['id'],
+                'text': comment_data['text'],
+                'score': comment_data['score'],
+                'creation_date': format_date(comment_data['creation_date']),
+                'user_id': comment_data['user_id'],
+                'user_name': user_names.get(comment_data['user_id']) or "Unknown User"
             }
             comments.append(comment)
         
-        conn.close()
-        
         return templates.TemplateResponse("post_detail.html", {
             "request": request,
             "post": post,
@@ -340,22 +648,29 @@ async def post_detail(request: Request, post_id: int, site: Optional[str] = Quer
         })
         
     except Exception as e:
-        conn.close()
         if isinstance(e, HTTPException):
             raise e
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.get("/users", response_class=HTMLResponse)
-async def users_page(
+def users_page(
     request: Request,
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     search: Optional[str] = None,
     sort: str = Query("reputation"),
-    site: Optional[str] = Query(None)
+    site: Optional[str] = Query(None),
+    cursor_key: Optional[str] = None,
+    cursor_id: Optional[int] = None,
+    before: bool = False
 ):
-    """Browse users with pagination and filtering"""
+    """Browse users with pagination and filtering, using cursors like posts_page"""
     site = validate_site(site)
+    
+    # Without a search the total is the site's precomputed user count (looked up
+    # before borrowing a cursor, like posts_page)
+    known_total = None if search else load_site_totals(site, cache_bucket()).get("total_users")
+    
     conn = get_db()
     
     try:
@@ -371,25 +686,26 @@ async def users_page(
         
         where_clause = " AND ".join(where_conditions)
         
-        # Build ORDER BY clause
-        if sort == "reputation":
-            order_clause = "reputation DESC"
-        elif sort == "recent":
-            order_clause = "creation_date DESC"
-        elif sort == "name":
-            order_clause = "display_name ASC"
-        else:
-            order_clause = "reputation DESC"
-        
-        # Get total count
+        # Fallback total count, used when the page query's window count cannot give the total
         count_query = f"SELECT COUNT(*) FROM users WHERE {where_clause}"
-        total = conn.execute(count_query, params).fetchone()[0]
+        count_params = list(params)
+        
+        # Build ORDER BY clause and cursor condition
+        sort_spec = USER_SORTS.get(sort, USER_SORTS["reputation"])
+        cursor_condition, cursor_params, order_clause = keyset_page(sort_spec, cursor_key, cursor_id, before)
+        before = before and cursor_condition is not None
+        if cursor_condition:
+            where_clause += f" AND {cursor_condition}"
+            params.extend(cursor_params)
+            offset = 0
         
         # Get users
         query = f"""
             SELECT 
-                id, display_name, reputation, creation_date, 
-                location, views, up_votes, down_votes
+                id, display_name, reputation,
+                COALESCE(strftime(creation_date, '{DATE_FORMAT}'), '') AS creation_date_text,
+                location, views, up_votes, down_votes, {sort_spec[0]} AS sort_key
+                {", COUNT(*) OVER () AS matched" if known_total is None else ""}
             FROM users 
             WHERE {where_clause}
             ORDER BY {order_clause}
@@ -398,6 +714,12 @@ async def users_page(
         params.extend([limit, offset])
         
         users_data = conn.execute(query, params).fetchall()
+        if known_total is not None:
+            total = known_total
+        else:
+            total = listing_total(conn, count_query, count_params, users_data, cursor_condition is not None, before, page, limit)
+        if before:
+            users_data.reverse()
         
         # Format users data
         users = []
@@ -406,7 +728,7 @@ async def users_page(
                 'id': row[0],
                 'display_name': row[1],
                 'reputation': row[2],
-                'creation_date': format_date(row[3]),
+                'creation_date': row[3],
                 'location': row[4] or "",
                 'views': row[5],
                 'up_votes': row[6],
@@ -424,6 +746,7 @@ async def users_page(
             "users": users,
             "current_page": page,
             "total_pages": total_pages,
+            "page_numbers": page_numbers(page, total_pages),
             "total_users": total,
             "search": search or "",
             "sort": sort,
@@ -431,6 +754,8 @@ async def users_page(
             "has_next": page < total_pages,
             "prev_page": page - 1 if page > 1 else None,
             "next_page": page + 1 if page < total_pages else None,
+            "prev_cursor": page_cursor(users_data[0], 8) if users_data else None,
+            "next_cursor": page_cursor(users_data[-1], 8) if users_data else None,
             "current_site": site,
             "available_sites": get_available_sites()
         })
@@ -439,21 +764,17 @@ async def users_page(
         conn.close()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-@app.get("/analytics", response_class=HTMLResponse)
-async def analytics(request: Request, site: Optional[str] = Query(None)):
-    """Analytics dashboard with charts and insights"""
-    site = validate_site(site)
+@lru_cache(maxsize=32)
+def load_analytics_data(site: str, bucket: int) -> Dict[str, Any]:
+    """Load the analytics dashboard data for a site and cache bucket"""
     conn = get_db()
     
     try:
-        # Posts over time
+        # Posts over time, precomputed at import time
         posts_over_time = conn.execute("""
-            SELECT 
-                DATE_TRUNC('month', creation_date) as month,
-                COUNT(*) as count
-            FROM posts 
-            WHERE post_type_id = 1 AND site = ?
-            GROUP BY DATE_TRUNC('month', creation_date)
+            SELECT month, count
+            FROM posts_by_month
+            WHERE site = ?
             ORDER BY month
         """, [site]).fetchall()
         
@@ -466,65 +787,53 @@ async def analytics(request: Request, site: Optional[str] = Query(None)):
             LIMIT 10
         """, [site]).fetchall()
         
-        # Popular tags
+        # Popular tags, precomputed at import time
         popular_tags = conn.execute("""
             SELECT tag_name, count
-            FROM tags
+            FROM top_tags
             WHERE site = ?
-            ORDER BY count DESC
+            ORDER BY rank
             LIMIT 15
         """, [site]).fetchall()
         
-        # Post score distribution
+        # Post score distribution, precomputed at import time
         score_distribution = conn.execute("""
-            SELECT 
-                score_range,
-                COUNT(*) as count
-            FROM (
-                SELECT 
-                    CASE 
-                        WHEN score < 0 THEN 'Negative'
-                        WHEN score = 0 THEN 'Zero'
-                        WHEN score BETWEEN 1 AND 5 THEN '1-5'
-                        WHEN score BETWEEN 6 AND 10 THEN '6-10'
-                        WHEN score BETWEEN 11 AND 20 THEN '11-20'
-                        ELSE '20+'
-                    END as score_range,
-                    CASE 
-                        WHEN score < 0 THEN 1
-                        WHEN score = 0 THEN 2
-                        WHEN score BETWEEN 1 AND 5 THEN 3
-                        WHEN score BETWEEN 6 AND 10 THEN 4
-                        WHEN score BETWEEN 11 AND 20 THEN 5
-                        ELSE 6
-                    END as sort_order
-                FROM posts
-                WHERE post_type_id = 1 AND site = ?
-            ) sub
-            GROUP BY score_range, sort_order
+            SELECT range_name, count
+            FROM score_distribution
+            WHERE site = ?
             ORDER BY sort_order
         """, [site]).fetchall()
         
+        return {
+            "posts_over_time": posts_over_time,
+            "top_users": top_users,
+            "popular_tags": popular_tags,
+            "score_distribution": score_distribution
+        }
+    finally:
         conn.close()
+
+@app.get("/analytics", response_class=HTMLResponse)
+def analytics(request: Request, site: Optional[str] = Query(None)):
+    """Analytics dashboard with charts and insights"""
+    site = validate_site(site)
+    
+    try:
+        data = load_analytics_data(site, cache_bucket())
         
         return templates.TemplateResponse("analytics.html", {
             "request": request,
-            "posts_over_time": posts_over_time,
-            "top_users": top_users,
-            "popular_tags": popular_tags,
-            "score_distribution": score_distribution,
+            **data,
             "current_site": site,
             "available_sites": get_available_sites()
         })
         
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-@app.get("/api/tags", response_class=JSONResponse)
-async def api_tags(search: Optional[str] = None, site: Optional[str] = Query(None)):
-    """API endpoint for tag search (for autocomplete)"""
-    site = validate_site(site)
+@lru_cache(maxsize=1024)
+def load_tags(site: str, search: Optional[str], bucket: int) -> tuple:
+    """Load tags starting with a lowercase search term (or the top tags without one) for a cache bucket"""
     conn = get_db()
     
     try:
@@ -532,48 +841,61 @@ async def api_tags(search: Optional[str] = None, site: Optional[str] = Query(Non
             query = """
                 SELECT tag_name, count 
                 FROM tags 
-                WHERE tag_name ILIKE ? AND site = ?
+                WHERE site = ? AND starts_with(lower(tag_name), ?)
                 ORDER BY count DESC 
                 LIMIT 10
             """
-            tags = conn.execute(query, [f"%{search}%", site]).fetchall()
+            tags = conn.execute(query, [site, search]).fetchall()
         else:
             query = """
                 SELECT tag_name, count 
-                FROM tags 
+                FROM top_tags
                 WHERE site = ?
-                ORDER BY count DESC 
+                ORDER BY rank
                 LIMIT 20
             """
             tags = conn.execute(query, [site]).fetchall()
         
+        return tuple(tags)
+    finally:
         conn.close()
+
+@app.get("/api/tags", response_class=ORJSONResponse)
+def api_tags(search: Optional[str] = None, site: Optional[str] = Query(None)):
+    """API endpoint for tag search (for autocomplete)"""
+    site = validate_site(site)
+    
+    try:
+        # Matching is case-insensitive; the term is lowercased once here
+        tags = load_tags(site, search.lower() if search else None, cache_bucket())
         
-        return {"tags": [{"name": tag[0], "count": tag[1]} for tag in tags]}
+        # Let browsers reuse autocomplete results for as long as the server caches them
+        return ORJSONResponse(
+            {"tags": [{"name": tag[0], "count": tag[1]} for tag in tags]},
+            headers={"Cache-Control": f"public, max-age={CACHE_TTL_SECONDS}"}
+        )
         
     except Exception as e:
-        conn.close()
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.get("/switch-site/{new_site}")
-async def switch_site(new_site: str, request: Request):
+def switch_site(new_site: str, request: Request):
     """Switch to a different site"""
     # Validate the site exists
-    available_sites = get_available_sites()
-    if new_site not in available_sites:
+    if new_site not in load_site_set(cache_bucket()):
         raise HTTPException(status_code=404, detail="Site not found")
     
     # Get the referring page to redirect back to
     referer = request.headers.get("referer", "/")
     
     # Parse the referer URL to maintain the current page but switch site
-    from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
-    
     parsed = urlparse(referer)
     query_params = parse_qs(parsed.query)
     
-    # Update or add the site parameter
+    # Update or add the site parameter; listing cursors belong to the old site
     query_params["site"] = [new_site]
+    for param in PAGE_CURSOR_PARAMS:
+        query_params.pop(param, None)
     
     # Rebuild the URL
     new_query = urlencode(query_params, doseq=True)
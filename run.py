@@ -4,13 +4,15 @@ StackSlice - Multi-Site Stack Exchange Data Explorer
 Startup script that imports data for multiple sites and starts the web server
 """
 
+import importlib.util
+import io
 import os
+import shutil
 import sys
+import tempfile
 from pathlib import Path
 import logging
-import requests
-import zipfile
-import py7zr
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 
 # Setup logging
@@ -28,6 +30,23 @@ REQUIRED_FILES = [
     "Votes.xml", "Badges.xml", "Tags.xml"
 ]
 
+# Archives up to this size are buffered in memory; larger ones spill to an
+# anonymous temporary file, as 7z needs a seekable archive to read its header
+ARCHIVE_MEMORY_LIMIT = 512 << 20
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+def missing_data_files(data_dir):
+    """List the required dump files absent from a data directory, accepting gzip or zstd copies"""
+    try:
+        with os.scandir(data_dir) as entries:
+            names = {entry.name for entry in entries}
+    except FileNotFoundError:
+        names = set()
+    return [
+        file for file in REQUIRED_FILES
+        if not any(f"{file}{suffix}" in names for suffix in ("", ".gz", ".zst"))
+    ]
+
 def get_sites_to_import():
     """Get the list of sites to import from environment or use defaults"""
     sites_env = os.environ.get("STACKEXCHANGE_SITES")
@@ -37,6 +56,10 @@ def get_sites_to_import():
 
 def download_site_data(site_name):
     """Download Stack Exchange data for a specific site"""
+    # Only needed when a site has to be fetched, so kept off the startup path
+    import requests
+    import py7zr
+    
     logger.info(f"Downloading data for {site_name}...")
     
     # Create data directory
@@ -46,32 +69,31 @@ def download_site_data(site_name):
     # Download URL
     archive_filename = f"{site_name}.7z"
     download_url = urljoin(ARCHIVE_BASE_URL, archive_filename)
-    local_archive_path = data_dir / archive_filename
     
     try:
-        # Download the archive
+        # Download the archive into a buffer instead of a file in the data directory
         logger.info(f"Downloading from {download_url}...")
-        response = requests.get(download_url, stream=True)
+        # Fail fast on a stalled connect, but let a multi-GB body take as long as it needs
+        response = requests.get(download_url, stream=True, timeout=(10, None))
         response.raise_for_status()
+        size = int(response.headers.get("Content-Length") or 0)
+        buffer = io.BytesIO() if 0 < size <= ARCHIVE_MEMORY_LIMIT else tempfile.TemporaryFile()
         
-        # Save to local file
-        with open(local_archive_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        
-        logger.info(f"Downloaded {local_archive_path}")
-        
-        # Extract the archive
-        logger.info("Extracting archive...")
-        with py7zr.SevenZipFile(local_archive_path, mode='r') as archive:
-            archive.extractall(path=data_dir)
+        with buffer:
+            with response:
+                response.raw.decode_content = True
+                shutil.copyfileobj(response.raw, buffer, DOWNLOAD_CHUNK_SIZE)
+            
+            logger.info(f"Downloaded {archive_filename}")
+            
+            # Extract the archive
+            logger.info("Extracting archive...")
+            buffer.seek(0)
+            with py7zr.SevenZipFile(buffer, mode='r') as archive:
+                archive.extractall(path=data_dir)
         
         logger.info("Extraction completed")
         
-        # Clean up archive file
-        local_archive_path.unlink()
-        logger.info("Archive file cleaned up")
-        
         return True
         
     except requests.exceptions.RequestException as e:
@@ -88,13 +110,7 @@ def check_site_data(site_name):
     logger.info(f"Checking data for site: {site_name}")
     
     # Check if all required files exist
-    missing_files = []
-    if data_dir.exists():
-        for file in REQUIRED_FILES:
-            if not (data_dir / file).exists():
-                missing_files.append(file)
-    else:
-        missing_files = REQUIRED_FILES.copy()
+    missing_files = missing_data_files(data_dir)
     
     if missing_files:
         logger.info(f"Missing files for {site_name}: {missing_files}")
@@ -102,10 +118,7 @@ def check_site_data(site_name):
         
         if download_site_data(site_name):
             # Re-check after download
-            missing_files = []
-            for file in REQUIRED_FILES:
-                if not (data_dir / file).exists():
-                    missing_files.append(file)
+            missing_files = missing_data_files(data_dir)
             
             if missing_files:
                 logger.error(f"Still missing files for {site_name} after download: {missing_files}")
@@ -122,7 +135,7 @@ def check_site_data(site_name):
 def import_all_sites():
     """Import Stack Exchange data for all configured sites into DuckDB"""
     try:
-        from data_importer import StackExchangeDataImporter
+        from data_importer import StackExchangeDataImporter, derived_data_complete
         
         db_path = "stackexchange.db"
         sites = get_sites_to_import()
@@ -130,7 +143,8 @@ def import_all_sites():
         # Check if database already exists and has data
         if os.path.exists(db_path):
             import duckdb
-            conn = duckdb.connect(db_path)
+            # A read-only handle is enough for the check and skips taking the write lock
+            conn = duckdb.connect(db_path, read_only=True)
             try:
                 sites_in_db = conn.execute("SELECT DISTINCT site FROM posts").fetchall()
                 existing_sites = {site[0] for site in sites_in_db}
@@ -139,7 +153,20 @@ def import_all_sites():
                 sites_to_import = set(sites) - existing_sites
                 if not sites_to_import:
                     logger.info(f"Database already contains data for all sites: {sites}")
+                    try:
+                        complete = derived_data_complete(conn)
+                    except duckdb.Error:
+                        complete = False
                     conn.close()
+                    
+                    # Databases imported before summary tables or the search index
+                    # existed need them built once; only then is a writer opened
+                    if not complete:
+                        importer = StackExchangeDataImporter(db_path)
+                        try:
+                            importer.refresh_missing_summaries()
+                        finally:
+                            importer.close()
                     return True
                 else:
                     logger.info(f"Need to import data for sites: {sites_to_import}")
@@ -163,6 +190,10 @@ def import_all_sites():
                 logger.info(f"Import completed for {site_name}:")
                 for table, count in stats.items():
                     logger.info(f"  {table}: {count:,}")
+            
+            # Sites imported earlier may still lack summaries from a newer schema;
+            # the search index covers all sites, so it is rebuilt once here
+            importer.refresh_missing_summaries(rebuild_index=True)
         
         finally:
             importer.close()
@@ -178,19 +209,32 @@ def start_server():
     """Start the FastAPI web server"""
     try:
         import uvicorn
-        from main import app
         
         # Get port from environment (for cloud deployment)
         port = int(os.environ.get("PORT", 8000))
         
+        # Worker processes, from WEB_CONCURRENCY like uvicorn itself; exported so
+        # each worker can size its share of DuckDB threads and cursors
+        workers = int(os.environ.get("WEB_CONCURRENCY") or min(os.cpu_count() or 1, 4))
+        os.environ["WEB_CONCURRENCY"] = str(workers)
+        
         logger.info("Starting StackSlice multi-site web server...")
-        logger.info(f"Access the application at: http://localhost:{port}")
+        logger.info(f"Access the application at: http://localhost:{port} ({workers} workers)")
+        
+        # uvloop and httptools come with uvicorn[standard]; uvloop has no Windows build
+        loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
         
+        # Workers are separate processes, so the app is passed as an import string
         uvicorn.run(
-            app, 
+            "main:app", 
             host="0.0.0.0", 
             port=port,
-            log_level="info"
+            workers=workers,
+            log_level="info",
+            # Per-request access lines are written synchronously; keep them for development only
+            access_log=bool(os.environ.get("STACKSLICE_DEV")),
+            loop=loop,
+            http="httptools"
         )
         
     except Exception as e:
@@ -202,9 +246,12 @@ def main():
     sites = get_sites_to_import()
     logger.info(f"Starting StackSlice for sites: {', '.join(sites)}")
     
-    # Check data for all sites
-    for site in sites:
-        if not check_site_data(site):
+    # Check data for all sites, downloading missing ones in parallel
+    with ThreadPoolExecutor(max_workers=min(4, len(sites))) as executor:
+        results = list(executor.map(check_site_data, sites))
+    
+    for site, ok in zip(sites, results):
+        if not ok:
             logger.error(f"Failed to get data for {site}. Exiting.")
             sys.exit(1)
     